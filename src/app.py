@@ -7,13 +7,16 @@ from flask import Flask, request, jsonify, abort
 from flask_migrate import Migrate
 from flask_cors import CORS
 from datetime import timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import selectinload
 from sqlalchemy.orm.exc import NoResultFound
 from flask_jwt_extended import JWTManager, create_access_token, get_jwt_identity, jwt_required
 from flask_bcrypt import Bcrypt
 
-from utils import APIException, generate_sitemap
+from utils import APIException, generate_sitemap, parse_list_arg, parse_fields_arg, int_id
 from admin import setup_admin
-from models import db, User, Mueble, Favorito
+from billing import register_billing_commands, next_month
+from models import db, User, Mueble, Favorito, ResumenAlquiler
 
 app = Flask(__name__)
 app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "clave_secreta")
@@ -30,6 +33,7 @@ MIGRATE = Migrate(app, db)
 db.init_app(app)
 CORS(app)
 setup_admin(app)
+register_billing_commands(app)
 
 @app.errorhandler(APIException)
 def handle_invalid_usage(error):
@@ -39,6 +43,28 @@ def handle_invalid_usage(error):
 def sitemap():
     return generate_sitemap(app)
 
+def batch_get(model, pk_key, relation, ids, fields):
+    # Resolves every id with a single IN query; with fields only those columns are selected
+    pk = model.serialize_columns[pk_key]
+    if fields is None:
+        query = model.query.options(selectinload(relation))
+        keys = None
+    else:
+        keys = list(dict.fromkeys([pk_key] + fields))
+        query = db.session.query(*[model.serialize_columns[key] for key in keys])
+    if ids is not None:
+        query = query.filter(pk.in_(ids))
+
+    if keys is None:
+        results = [item.serialize() for item in query.all()]
+    else:
+        results = [dict(zip(keys, row)) for row in query.all()]
+
+    if ids is not None:
+        position = {item_id: index for index, item_id in enumerate(ids)}
+        results.sort(key=lambda item: position[item[pk_key]])
+    return results
+
 @app.route('/users', methods=['POST'])
 def create_user():
     data = request.get_json()
@@ -60,8 +86,9 @@ def create_user():
 
 @app.route('/users', methods=['GET'])
 def get_all_users():
-    all_users = User.query.all()
-    return jsonify([user.serialize() for user in all_users]), 200
+    ids = parse_list_arg('ids', cast=int_id)
+    fields = parse_fields_arg(User)
+    return jsonify(batch_get(User, 'id', User.favoritos, ids, fields)), 200
 
 @app.route('/users/<int:id>', methods=['GET'])
 def get_user(id):
@@ -188,8 +215,9 @@ def create_muebles():
 
 @app.route('/mueble', methods=['GET'])
 def get_all_muebles():
-    all_muebles = Mueble.query.all()
-    return jsonify([mueble.serialize() for mueble in all_muebles]), 200
+    ids = parse_list_arg('ids')
+    fields = parse_fields_arg(Mueble)
+    return jsonify(batch_get(Mueble, 'id_codigo', Mueble.favoritos, ids, fields)), 200
 
 @app.route('/mueble/<string:id_codigo>', methods=['GET'])
 def get_mueble(id_codigo):
@@ -260,6 +288,58 @@ def delete_favorito(id):
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
+@app.route('/reportes/ingresos/mes', methods=['GET'])
+@jwt_required()
+def get_ingresos_por_mes():
+    rows = db.session.query(
+        ResumenAlquiler.mes,
+        func.sum(ResumenAlquiler.ingresos),
+        func.sum(ResumenAlquiler.alquileres)
+    ).group_by(ResumenAlquiler.mes).order_by(ResumenAlquiler.mes).all()
+    return jsonify([{"mes": mes.strftime("%Y-%m"), "ingresos": float(ingresos), "alquileres": alquileres} for mes, ingresos, alquileres in rows]), 200
+
+@app.route('/reportes/ingresos/categoria', methods=['GET'])
+@jwt_required()
+def get_ingresos_por_categoria():
+    rows = db.session.query(
+        ResumenAlquiler.categoria,
+        func.sum(ResumenAlquiler.ingresos),
+        func.sum(ResumenAlquiler.alquileres)
+    ).group_by(ResumenAlquiler.categoria).order_by(ResumenAlquiler.categoria).all()
+    return jsonify([{"categoria": categoria, "ingresos": float(ingresos), "alquileres": alquileres} for categoria, ingresos, alquileres in rows]), 200
+
+@app.route('/reportes/ingresos/usuario', methods=['GET'])
+@jwt_required()
+def get_ingresos_por_usuario():
+    rows = db.session.query(
+        ResumenAlquiler.user_id,
+        func.sum(ResumenAlquiler.ingresos),
+        func.sum(ResumenAlquiler.alquileres)
+    ).group_by(ResumenAlquiler.user_id).order_by(ResumenAlquiler.user_id).all()
+    return jsonify([{"user_id": user_id, "ingresos": float(ingresos), "alquileres": alquileres} for user_id, ingresos, alquileres in rows]), 200
+
+@app.route('/reportes/ocupacion/mueble', methods=['GET'])
+@jwt_required()
+def get_ocupacion_por_mueble():
+    rows = db.session.query(
+        ResumenAlquiler.mueble_id,
+        ResumenAlquiler.mes,
+        func.sum(ResumenAlquiler.dias_ocupados),
+        func.sum(ResumenAlquiler.ingresos)
+    ).group_by(ResumenAlquiler.mueble_id, ResumenAlquiler.mes).order_by(ResumenAlquiler.mueble_id, ResumenAlquiler.mes).all()
+
+    ocupacion = []
+    for mueble_id, mes, dias_ocupados, ingresos in rows:
+        dias_mes = (next_month(mes) - mes).days
+        ocupacion.append({
+            "mueble_id": mueble_id,
+            "mes": mes.strftime("%Y-%m"),
+            "dias_ocupados": dias_ocupados,
+            "ocupacion": round(min(dias_ocupados, dias_mes) / dias_mes, 4),
+            "ingresos": float(ingresos)
+        })
+    return jsonify(ocupacion), 200
+
 
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=3000, debug=False)
@@ -0,0 +1,127 @@
+import click
+from datetime import datetime, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from sqlalchemy.orm.exc import NoResultFound
+from models import db, Alquiler, Mueble, ResumenAlquiler, EstadoResumen
+
+CHUNK_SIZE = 1000
+CENTIMO = Decimal("0.01")
+
+def next_month(mes):
+    return (mes.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def split_by_month(fecha_inicio, fecha_fin):
+    # Yields (first day of month, days rented, days in month) for every month the rental touches
+    mes = fecha_inicio.replace(day=1)
+    while mes <= fecha_fin:
+        siguiente = next_month(mes)
+        dias = (min(fecha_fin, siguiente - timedelta(days=1)) - max(fecha_inicio, mes)).days + 1
+        yield mes, dias, (siguiente - mes).days
+        mes = siguiente
+
+def aggregate_chunk(rows):
+    # pago_mensual is prorated by the days rented in each month and rounded to the cent per rental,
+    # so totals don't depend on chunking; a rental is counted in its start month
+    totals = {}
+    for row in rows:
+        for mes, dias, dias_mes in split_by_month(row.fecha_inicio, row.fecha_fin):
+            key = (mes, row.user_id, row.mueble_id)
+            if key not in totals:
+                totals[key] = {"categoria": row.categoria, "alquileres": 0, "ingresos": Decimal(0), "dias_ocupados": 0}
+            if mes == row.fecha_inicio.replace(day=1):
+                totals[key]["alquileres"] += 1
+            cargo = Decimal(row.pago_mensual) * dias / dias_mes
+            totals[key]["ingresos"] += cargo.quantize(CENTIMO, rounding=ROUND_HALF_UP)
+            totals[key]["dias_ocupados"] += dias
+    return totals
+
+def merge_chunk(totals):
+    # Adds the chunk totals onto the summary rows, loading the existing ones in a single query
+    if not totals:
+        return
+    meses = {key[0] for key in totals}
+    muebles = {key[2] for key in totals}
+    existing = ResumenAlquiler.query.filter(
+        ResumenAlquiler.mes.in_(meses),
+        ResumenAlquiler.mueble_id.in_(muebles)
+    ).all()
+    by_key = {(resumen.mes, resumen.user_id, resumen.mueble_id): resumen for resumen in existing}
+
+    for (mes, user_id, mueble_id), values in totals.items():
+        resumen = by_key.get((mes, user_id, mueble_id))
+        if resumen is None:
+            db.session.add(ResumenAlquiler(mes=mes, user_id=user_id, mueble_id=mueble_id, **values))
+            continue
+        resumen.categoria = values["categoria"]
+        resumen.alquileres += values["alquileres"]
+        resumen.ingresos = Decimal(resumen.ingresos) + values["ingresos"]
+        resumen.dias_ocupados += values["dias_ocupados"]
+
+def lock_estado():
+    # SELECT ... FOR UPDATE on the estado_resumen row seeded by the migration, so refreshes never overlap
+    return EstadoResumen.query.with_for_update().filter_by(id=1).one()
+
+def refresh_summary(chunk_size=CHUNK_SIZE, full=False):
+    # Folds every valid alquiler not yet marked as resumido into resumen_alquiler.
+    # Incremental runs commit per chunk; a full rebuild is a single transaction so reports never see it half done.
+    # Returns (alquileres folded, alquileres skipped because fecha_fin is before fecha_inicio).
+    estado = lock_estado()
+    if full:
+        ResumenAlquiler.query.delete()
+        Alquiler.query.update({Alquiler.resumido: False}, synchronize_session=False)
+
+    processed = 0
+    while True:
+        rows = db.session.query(
+            Alquiler.id,
+            Alquiler.fecha_inicio,
+            Alquiler.fecha_fin,
+            Alquiler.pago_mensual,
+            Alquiler.user_id,
+            Alquiler.mueble_id,
+            Mueble.categoria
+        ).join(Mueble, Alquiler.mueble_id == Mueble.id_codigo).filter(
+            Alquiler.resumido.is_(False),
+            Alquiler.fecha_fin >= Alquiler.fecha_inicio
+        ).order_by(Alquiler.id).limit(chunk_size).all()
+        if not rows:
+            break
+
+        merge_chunk(aggregate_chunk(rows))
+        Alquiler.query.filter(Alquiler.id.in_([row.id for row in rows])).update(
+            {Alquiler.resumido: True}, synchronize_session=False
+        )
+        processed += len(rows)
+        if full:
+            db.session.flush()
+        else:
+            estado.actualizado = datetime.utcnow()
+            db.session.commit()
+        db.session.expunge_all()
+        estado = lock_estado()
+
+    skipped = Alquiler.query.filter(
+        Alquiler.resumido.is_(False),
+        Alquiler.fecha_fin < Alquiler.fecha_inicio
+    ).count()
+    estado.actualizado = datetime.utcnow()
+    db.session.commit()
+    return processed, skipped
+
+def register_billing_commands(app):
+    @app.cli.group()
+    def billing():
+        """Rental billing and revenue reporting jobs."""
+
+    @billing.command("refresh")
+    @click.option("--full", is_flag=True, help="Rebuild the summary from scratch, needed after editing or deleting alquileres.")
+    @click.option("--chunk-size", default=CHUNK_SIZE, show_default=True, help="Alquileres read per batch.")
+    def refresh(full, chunk_size):
+        """Refresh the resumen_alquiler summary table."""
+        try:
+            processed, skipped = refresh_summary(chunk_size=chunk_size, full=full)
+        except NoResultFound:
+            raise click.ClickException("estado_resumen has no row, run `flask db upgrade` first")
+        click.echo(f"{processed} alquileres added to the summary")
+        if skipped:
+            click.echo(f"{skipped} alquileres skipped because fecha_fin is before fecha_inicio")
@@ -1,5 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import Column, Integer, String, Boolean, Enum, Date, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Boolean, Enum, Date, ForeignKey, Float, DateTime, Numeric, UniqueConstraint, false
 from sqlalchemy.orm import relationship
 from flask_bcrypt import Bcrypt
 
@@ -20,6 +20,17 @@ class User(db.Model):
     alquileres = relationship('Alquiler', back_populates='user')
     favoritos = relationship('Favorito', back_populates='user')
 
+    # Serialized key -> column, used to push ?fields= down into the SELECT
+    serialize_columns = {
+        "id": id,
+        "email": email,
+        "nombre": name,
+        "is_active": is_active,
+        "address": address,
+        "nationality": nationality,
+        "birth_date": birth_date
+    }
+
     def __repr__(self):
         return f'<User {self.email}>'
     
@@ -75,6 +86,25 @@ class Mueble(db.Model):
     alquileres = relationship('Alquiler', back_populates='mueble')
     favoritos = relationship('Favorito', back_populates='mueble')
 
+    # Serialized key -> column, used to push ?fields= down into the SELECT
+    serialize_columns = {
+        "id_codigo": id_codigo,
+        "nombre": nombre,
+        "disponible": disponible,
+        "color": color,
+        "espacio": espacio,
+        "estilo": estilo,
+        "categoria": categoria,
+        "precio_mes": precio_mes,
+        "fecha_entrega": fecha_entrega,
+        "fecha_recogida": fecha_recogida,
+        "ancho": ancho,
+        "altura": altura,
+        "fondo": fondo,
+        "imagen": imagen,
+        "personalidad": personalidad
+    }
+
     def __repr__(self):
         return f'<Mueble {self.id_codigo}>'
 
@@ -107,6 +137,7 @@ class Alquiler(db.Model):
     pago_mensual = Column(Integer, nullable=False)
     user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
     mueble_id = Column(String, ForeignKey('mueble.id_codigo'), nullable=False)
+    resumido = Column(Boolean, nullable=False, default=False, server_default=false(), index=True)
 
     user = relationship('User', back_populates='alquileres')
     mueble = relationship('Mueble', back_populates='alquileres')
@@ -143,3 +174,30 @@ class Favorito(db.Model):
             "user_id": self.user_id,
             "mueble_id": self.mueble_id
         }
+
+class ResumenAlquiler(db.Model):
+    # Materialized monthly summary of alquiler, refreshed by `flask billing refresh`
+    __tablename__ = "resumen_alquiler"
+    __table_args__ = (UniqueConstraint('mes', 'user_id', 'mueble_id'),)
+
+    id = Column(Integer, primary_key=True)
+    mes = Column(Date, nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey('user.id'), nullable=False)
+    mueble_id = Column(String, ForeignKey('mueble.id_codigo'), nullable=False)
+    categoria = Column(String(50), nullable=False, index=True)
+    alquileres = Column(Integer, nullable=False, default=0)
+    ingresos = Column(Numeric(12, 2), nullable=False, default=0)
+    dias_ocupados = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResumenAlquiler {self.mes} {self.mueble_id}>'
+
+class EstadoResumen(db.Model):
+    # Single row locked by `flask billing refresh` so overlapping runs don't fold the same alquileres twice
+    __tablename__ = "estado_resumen"
+
+    id = Column(Integer, primary_key=True)
+    actualizado = Column(DateTime)
+
+    def __repr__(self):
+        return f'<EstadoResumen {self.actualizado}>'
@@ -1,4 +1,4 @@
-from flask import jsonify, url_for
+from flask import jsonify, url_for, request
 
 class APIException(Exception):
     status_code = 400
@@ -15,6 +15,40 @@ class APIException(Exception):
         rv['message'] = self.message
         return rv
 
+MAX_LIST_ITEMS = 100
+MAX_INT_ID = 2147483647
+
+def int_id(value):
+    # int() that rejects ids outside the range of an Integer primary key
+    number = int(value)
+    if not 0 < number <= MAX_INT_ID:
+        raise ValueError(f"id out of range: {value}")
+    return number
+
+def parse_list_arg(name, cast=str, max_items=MAX_LIST_ITEMS):
+    # Reads a comma separated query param (?ids=A,B,C) into a list, None when absent or empty
+    value = request.args.get(name, '')
+    items = [item.strip() for item in value.split(',') if item.strip()]
+    if not items:
+        return None
+    if len(items) > max_items:
+        raise APIException(f"Too many values in '{name}' parameter (max {max_items})", status_code=400)
+    try:
+        return [cast(item) for item in items]
+    except ValueError:
+        raise APIException(f"Invalid value in '{name}' parameter", status_code=400)
+
+def parse_fields_arg(model):
+    # Validates ?fields= against the model's serialize_columns, None when absent
+    fields = parse_list_arg('fields')
+    if fields is None:
+        return None
+    unknown = [field for field in fields if field not in model.serialize_columns]
+    if unknown:
+        raise APIException(f"Unknown fields: {', '.join(unknown)}", status_code=400,
+                           payload={"allowed_fields": list(model.serialize_columns)})
+    return fields
+
 def has_no_empty_params(rule):
     defaults = rule.defaults if rule.defaults is not None else ()
     arguments = rule.arguments if rule.arguments is not None else ()